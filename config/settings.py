@@ -1,11 +1,56 @@
-from pydantic import BaseSettings
+import os
+from dataclasses import dataclass
+from functools import lru_cache
 
+ENV_PREFIX = 'APP_'
 
-class AppSetting(BaseSettings):
+
+@dataclass(frozen=True, slots=True)
+class AppSetting:
     log_level: str = 'DEBUG'
+    host: str = '0.0.0.0'
+    port: int = 8000
+    api_prefix: str = '/api'
+    enable_file_logging: bool = False
+    log_file_path: str = 'app.log'
+    files_path: str = 'files'
+    enable_parents_index: bool = True
+    weather_url: str = 'http://weather_server:8080/api/'
+    reserve_weather_url: str = (
+        'http://reserve_weather_server:8081/weather/month'
+    )
+
+
+def _env(name: str, default: str) -> str:
+    return os.environ.get(f'{ENV_PREFIX}{name.upper()}', default)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = _env(name, str(default))
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
 
-    class Config:
-        env_prefix = 'APP_'
+@lru_cache(maxsize=1)
+def get_settings() -> AppSetting:
+    defaults = AppSetting()
+    return AppSetting(
+        log_level=_env('log_level', defaults.log_level),
+        host=_env('host', defaults.host),
+        port=int(_env('port', str(defaults.port))),
+        api_prefix=_env('api_prefix', defaults.api_prefix),
+        enable_file_logging=_env_bool(
+            'enable_file_logging', defaults.enable_file_logging
+        ),
+        log_file_path=_env('log_file_path', defaults.log_file_path),
+        files_path=_env('files_path', defaults.files_path),
+        enable_parents_index=_env_bool(
+            'enable_parents_index', defaults.enable_parents_index
+        ),
+        weather_url=_env('weather_url', defaults.weather_url),
+        reserve_weather_url=_env(
+            'reserve_weather_url', defaults.reserve_weather_url
+        ),
+    )
 
 
-app_settings = AppSetting()
+app_settings = get_settings()
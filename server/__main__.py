@@ -0,0 +1,16 @@
+import os
+
+import uvicorn
+
+from config.settings import app_settings
+
+if __name__ == '__main__':
+    uvicorn.run(
+        'server.asgi:app',
+        host=app_settings.host,
+        port=app_settings.port,
+        loop='uvloop',
+        http='httptools',
+        workers=os.cpu_count(),
+        log_config=None,
+    )
@@ -1,10 +1,450 @@
-from fastapi import APIRouter
+import asyncio
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator
 
+import yaml
+from fastapi import APIRouter, Depends, Request
+from lxml import etree
+from watchdog.events import (
+    EVENT_TYPE_CREATED,
+    EVENT_TYPE_DELETED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED,
+    FileSystemEvent,
+    FileSystemEventHandler,
+    FileSystemMovedEvent,
+)
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
+
+from config.settings import app_settings
 from server import contracts
 
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+# PyYAML falls back to the pure Python loader unless asked for libyaml,
+# which is only available when PyYAML was built against it.
+try:
+    from yaml import CSafeLoader as _YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as _YAMLLoader  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+FileData = dict[str, Any]
+ChildIndex = dict[str, list[str]]
+
+
+class FileParser(ABC):
+    @abstractmethod
+    def parse(self, file_path: str) -> FileData | None:
+        """Returns persons from the file or None if it is malformed."""
+
+    def iter_persons(self, file_path: str) -> Iterator[FileData]:
+        file_data = self.parse(file_path)
+        if file_data is not None:
+            yield from file_data.get('persons', [])
+
+
+class JSONFileParser(FileParser):
+    def parse(self, file_path: str) -> FileData | None:
+        with open(file_path, encoding='utf-8') as file:
+            try:
+                data: FileData = json.load(file)
+            except json.JSONDecodeError:
+                logger.warning('Skipping malformed JSON file %s', file_path)
+                return None
+        return data
+
+    def iter_persons(self, file_path: str) -> Iterator[FileData]:
+        if ijson is None:
+            yield from super().iter_persons(file_path)
+            return
+        # Streams persons one by one instead of loading the whole file.
+        with open(file_path, 'rb') as file:
+            try:
+                yield from ijson.items(file, 'persons.item', use_float=True)
+            except ijson.JSONError:
+                logger.warning('Skipping malformed JSON file %s', file_path)
+
+
+class YMLFileParser(FileParser):
+    def parse(self, file_path: str) -> FileData | None:
+        with open(file_path, encoding='utf-8') as file:
+            try:
+                data: FileData = yaml.load(file, Loader=_YAMLLoader)
+            except yaml.YAMLError:
+                logger.warning('Skipping malformed YAML file %s', file_path)
+                return None
+        return data
+
+
+class XMLFileParser(FileParser):
+    def parse(self, file_path: str) -> FileData | None:
+        try:
+            return self._parse_parents_children(file_path)
+        except etree.XMLSyntaxError:
+            logger.warning('Skipping malformed XML file %s', file_path)
+            return None
+
+    @staticmethod
+    def _parse_parents_children(file_path: str) -> FileData:
+        persons = []
+        for _, person in etree.iterparse(
+            file_path, events=('end',), tag='person'
+        ):
+            # Only persons right under the root count, nested ones are
+            # dropped together with their top-level element.
+            root = person.getparent()
+            if root is None or root.getparent() is not None:
+                continue
+            name = person.get('name')
+            if name is not None:
+                child_names = (
+                    child.get('name') for child in person.iterchildren('child')
+                )
+                persons.append(
+                    {
+                        'name': name,
+                        'children': [
+                            {'name': child_name}
+                            for child_name in child_names
+                            if child_name is not None
+                        ],
+                    }
+                )
+            # Drop processed elements so memory stays flat on big files.
+            person.clear()
+            while person.getprevious() is not None:
+                del root[0]
+        return {'persons': persons}
+
+
+_PARSERS: dict[type[FileParser], FileParser] = {
+    JSONFileParser: JSONFileParser(),
+    XMLFileParser: XMLFileParser(),
+    YMLFileParser: YMLFileParser(),
+}
+
+
+class AbstractFileFactory(ABC):
+    extensions: tuple[str, ...] = ()
+
+    def is_correct_format(self, file_path: str) -> bool:
+        return os.path.splitext(file_path)[1] in self.extensions
+
+    @abstractmethod
+    def create_parser(self) -> FileParser:
+        """Returns the parser for files of this factory's format."""
+
+
+class JSONFileFactory(AbstractFileFactory):
+    extensions = ('.json',)
+
+    def create_parser(self) -> FileParser:
+        return _PARSERS[JSONFileParser]
+
+
+class YMLFileFactory(AbstractFileFactory):
+    extensions = ('.yaml', '.yml')
+
+    def create_parser(self) -> FileParser:
+        return _PARSERS[YMLFileParser]
+
+
+class XMLFileFactory(AbstractFileFactory):
+    extensions = ('.xml',)
+
+    def create_parser(self) -> FileParser:
+        return _PARSERS[XMLFileParser]
+
+
+_FACTORIES = (JSONFileFactory(), YMLFileFactory(), XMLFileFactory())
+
+# Resolved once, so picking a parser for a file is a single dict lookup.
+_EXT_TO_PARSER: dict[str, FileParser] = {
+    extension: factory.create_parser()
+    for factory in _FACTORIES
+    for extension in factory.extensions
+}
+
+# Parsing is blocking file I/O, so it must not run on the event loop.
+# libyaml, lxml and yajl do most of the work in C, so files are parsed
+# in parallel.
+_PARSE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=os.cpu_count(), thread_name_prefix='file-parser'
+)
+
+# Child name -> parent names of recently parsed files, along with the
+# file's mtime so that edited files get parsed again. The cache is
+# shared by the parser threads, hence the lock.
+_CHILD_INDEX_CACHE_SIZE = 1024
+_CHILD_INDEX_CACHE: OrderedDict[str, tuple[int, ChildIndex]] = OrderedDict()
+_CHILD_INDEX_CACHE_LOCK = threading.Lock()
+
+# Errors of a single file that must not fail the whole lookup: the file
+# vanished after the walk, is not valid UTF-8, or has the wrong shape.
+_SKIPPED_FILE_ERRORS = (
+    OSError,
+    ValueError,
+    KeyError,
+    TypeError,
+    AttributeError,
+)
+
+
+def _get_parser(file_path: str) -> FileParser | None:
+    # Slicing at the last dot avoids splitext's tuple allocation.
+    extension_start = file_path.rfind('.')
+    return _EXT_TO_PARSER.get(file_path[extension_start:])
+
+
+class FileIterator:
+    """Iterates over supported files under a directory with their parsers."""
+
+    def __init__(self, root: str) -> None:
+        self._files = self._file_generator(root)
+
+    def __iter__(self) -> 'FileIterator':
+        return self
+
+    def __next__(self) -> tuple[str, FileParser]:
+        for file_path in self._files:
+            parser = _get_parser(file_path)
+            if parser is not None:
+                return file_path, parser
+        raise StopIteration
+
+    @staticmethod
+    def _file_generator(root: str) -> Iterator[str]:
+        # DirEntry caches the file type reported by readdir, so unlike
+        # os.walk this needs no extra stat() per entry.
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                # Same as os.walk: a missing or unreadable directory is
+                # skipped instead of failing the whole walk.
+                logger.warning('Skipping unreadable directory %s', directory)
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path
+
+
+def _has_name(entry: Any) -> bool:
+    return isinstance(entry, dict) and isinstance(entry.get('name'), str)
+
+
+def _build_child_index(file_path: str, parser: FileParser) -> ChildIndex:
+    child_index: ChildIndex = {}
+    for person in parser.iter_persons(file_path):
+        # Entries of the wrong shape are skipped like malformed files.
+        if not _has_name(person):
+            continue
+        children = person.get('children')
+        if not isinstance(children, list):
+            continue
+        for child in children:
+            if _has_name(child):
+                child_index.setdefault(child['name'], []).append(
+                    person['name']
+                )
+    return child_index
+
+
+def _get_child_index(file_path: str, parser: FileParser) -> ChildIndex:
+    mtime = os.stat(file_path).st_mtime_ns
+    with _CHILD_INDEX_CACHE_LOCK:
+        cached = _CHILD_INDEX_CACHE.get(file_path)
+        if cached is not None and cached[0] == mtime:
+            _CHILD_INDEX_CACHE.move_to_end(file_path)
+            return cached[1]
+    child_index = _build_child_index(file_path, parser)
+    with _CHILD_INDEX_CACHE_LOCK:
+        _CHILD_INDEX_CACHE[file_path] = (mtime, child_index)
+        _CHILD_INDEX_CACHE.move_to_end(file_path)
+        while len(_CHILD_INDEX_CACHE) > _CHILD_INDEX_CACHE_SIZE:
+            _CHILD_INDEX_CACHE.popitem(last=False)
+    return child_index
+
+
+def _read_child_index(file_path: str, parser: FileParser) -> ChildIndex | None:
+    try:
+        return _get_child_index(file_path, parser)
+    except _SKIPPED_FILE_ERRORS as error:
+        logger.warning('Skipping unusable file %s: %r', file_path, error)
+        return None
+
+
+def _find_parents_in_file(
+    file_path: str, parser: FileParser, child_name: str
+) -> list[str]:
+    child_index = _read_child_index(file_path, parser)
+    if child_index is None:
+        return []
+    return child_index.get(child_name, [])
+
+
+class ParentsIndex(FileSystemEventHandler):
+    """Child name -> parent names over all files, kept in sync with disk."""
+
+    _UPDATE_EVENTS = (
+        EVENT_TYPE_CREATED,
+        EVENT_TYPE_DELETED,
+        EVENT_TYPE_MODIFIED,
+        EVENT_TYPE_MOVED,
+    )
+
+    def __init__(self, root: str) -> None:
+        super().__init__()
+        self._root = root
+        self._index: ChildIndex = {}
+        # Child index of every file, so a changed file only replaces its
+        # own share of the index.
+        self._file_indexes: dict[str, ChildIndex] = {}
+        self._update_lock = threading.Lock()
+        self._observer: BaseObserver | None = None
+
+    def get(self, child_name: str) -> list[str]:
+        return self._index.get(child_name, [])
+
+    def rebuild(self) -> None:
+        # Unchanged files come from _CHILD_INDEX_CACHE, so only the
+        # modified ones are parsed again.
+        with self._update_lock:
+            file_indexes: dict[str, ChildIndex] = {}
+            for file_path, parser in FileIterator(self._root):
+                child_index = _read_child_index(file_path, parser)
+                if child_index is not None:
+                    file_indexes[file_path] = child_index
+            self._file_indexes = file_indexes
+            self._merge()
+
+    def start(self) -> None:
+        self.rebuild()
+        observer = Observer()
+        observer.schedule(  # type: ignore[no-untyped-call]
+            self, self._root, recursive=True
+        )
+        try:
+            observer.start()  # type: ignore[no-untyped-call]
+        except OSError:
+            logger.warning(
+                'Cannot watch %s, the parents index will not be updated',
+                self._root,
+            )
+            return
+        self._observer = observer
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()  # type: ignore[no-untyped-call]
+            self._observer.join()
+            self._observer = None
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.event_type not in self._UPDATE_EVENTS:
+            return
+        if event.is_directory and event.event_type == EVENT_TYPE_MODIFIED:
+            # Fired along with the event of the file that changed.
+            return
+        try:
+            if event.is_directory:
+                # A created, removed or moved directory may hold any
+                # number of files.
+                self.rebuild()
+            elif isinstance(event, FileSystemMovedEvent):
+                self._update_files(
+                    removed=[event.src_path], changed=[event.dest_path]
+                )
+            elif event.event_type == EVENT_TYPE_DELETED:
+                self._update_files(removed=[event.src_path], changed=[])
+            else:
+                self._update_files(removed=[], changed=[event.src_path])
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Letting it propagate would stop the observer thread and
+            # with it every later update of the index.
+            logger.exception('Failed to update the parents index')
+
+    def _update_files(self, removed: list[str], changed: list[str]) -> None:
+        with self._update_lock:
+            updated = False
+            for file_path in removed:
+                if _get_parser(file_path) is not None:
+                    self._file_indexes.pop(file_path, None)
+                    updated = True
+            for file_path in changed:
+                parser = _get_parser(file_path)
+                if parser is None:
+                    continue
+                child_index = _read_child_index(file_path, parser)
+                if child_index is None:
+                    self._file_indexes.pop(file_path, None)
+                else:
+                    self._file_indexes[file_path] = child_index
+                updated = True
+            if updated:
+                self._merge()
+
+    def _merge(self) -> None:
+        index: ChildIndex = {}
+        for child_index in self._file_indexes.values():
+            for child_name, parents in child_index.items():
+                index.setdefault(child_name, []).extend(parents)
+        self._index = {
+            child_name: list(dict.fromkeys(parents))
+            for child_name, parents in index.items()
+        }
+
+
+def get_parents_index(request: Request) -> ParentsIndex | None:
+    parents_index: ParentsIndex | None = request.app.state.parents_index
+    return parents_index
+
 
-@router.get("/parents", response_model=contracts.Message)
-async def find_parent() -> contracts.Message:
-    return contracts.Message(message='found parents')
+@router.get('/parents/{child_name}', response_model=contracts.SearchResult)
+async def find_parent(
+    child_name: str,
+    parents_index: ParentsIndex | None = Depends(get_parents_index),
+) -> contracts.SearchResult:
+    if parents_index is not None:
+        return contracts.SearchResult(
+            found_parents=parents_index.get(child_name)
+        )
+    loop = asyncio.get_running_loop()
+    files: list[tuple[str, FileParser]] = await loop.run_in_executor(
+        _PARSE_EXECUTOR,
+        list,
+        FileIterator(app_settings.files_path),
+    )
+    results = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                _PARSE_EXECUTOR,
+                _find_parents_in_file,
+                file_path,
+                parser,
+                child_name,
+            )
+            for file_path, parser in files
+        )
+    )
+    parents = [parent for file_parents in results for parent in file_parents]
+    return contracts.SearchResult(found_parents=list(dict.fromkeys(parents)))
@@ -1,10 +1,306 @@
-from fastapi import APIRouter
+import asyncio
+import logging
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Generic, Sequence, TypeVar
 
+import httpx
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import BaseModel
+
+from config.settings import app_settings
 from server import contracts
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+Forecast = list[dict[str, float]]
+ResultT = TypeVar('ResultT', bound=BaseModel)
+
+_CACHE_TTL = 300.0
+_RESERVE_DAY_RE = re.compile(rb'"(-?[0-9.]+)C:(-?[0-9.]+)"')
+
+
+class ForecastHandler(ABC):
+    """Link of the chain of responsibility over weather sources."""
+
+    def __init__(self) -> None:
+        self._next_handler: ForecastHandler | None = None
+        self._forecast_cache: tuple[float, Forecast] | None = None
+        self._pending_forecast: asyncio.Task[Forecast] | None = None
+
+    def set_next(self, handler: 'ForecastHandler') -> 'ForecastHandler':
+        self._next_handler = handler
+        return handler
+
+    async def get_month_forecast(self) -> Forecast:
+        if self._forecast_cache is not None:
+            cached_at, forecast = self._forecast_cache
+            if time.monotonic() - cached_at < _CACHE_TTL:
+                return forecast
+        # Concurrent callers share one upstream request and all get its
+        # result, be it a forecast or an error. The shield keeps a client
+        # that disconnects from cancelling the request for the others.
+        if self._pending_forecast is None:
+            self._pending_forecast = asyncio.create_task(
+                self._refresh_month_forecast()
+            )
+            # Retrieve the error even when every caller was cancelled,
+            # otherwise asyncio logs it as never retrieved.
+            self._pending_forecast.add_done_callback(
+                lambda task: task.cancelled() or task.exception()
+            )
+        return await asyncio.shield(self._pending_forecast)
+
+    def cache_clear(self) -> None:
+        self._forecast_cache = None
+
+    async def _refresh_month_forecast(self) -> Forecast:
+        try:
+            forecast = await self._get_month_forecast()
+        finally:
+            self._pending_forecast = None
+        self._forecast_cache = (time.monotonic(), forecast)
+        return forecast
+
+    async def _get_month_forecast(self) -> Forecast:
+        forecast = await self.fetch()
+        if forecast is not None:
+            return forecast
+        if self._next_handler is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Weather service is unavailable',
+            )
+        return await self._next_handler.get_month_forecast()
+
+    @abstractmethod
+    async def fetch(self) -> Forecast | None:
+        """Returns the month forecast or None if the source failed."""
+
+
+class HTTPForecastHandler(ForecastHandler):
+    def __init__(self, client: httpx.AsyncClient, url: str) -> None:
+        super().__init__()
+        self._client = client
+        self._url = url
+
+    async def fetch(self) -> Forecast | None:
+        try:
+            response = await self._client.get(self._url)
+        except httpx.HTTPError:
+            logger.warning('Weather service %s is unreachable', self._url)
+            return None
+        if response.status_code != status.HTTP_200_OK:
+            logger.warning(
+                'Weather service %s responded with %s',
+                self._url,
+                response.status_code,
+            )
+            return None
+        try:
+            forecast = self._parse(response)
+        except (ValueError, KeyError, TypeError):
+            # A bad body must fail only this source, so the hedge can
+            # still take the answer of the other one.
+            logger.warning(
+                'Weather service %s sent a malformed forecast', self._url
+            )
+            return None
+        if not forecast:
+            logger.warning('Weather service %s sent no forecast', self._url)
+            return None
+        return forecast
+
+    @abstractmethod
+    def _parse(self, response: httpx.Response) -> Forecast:
+        """Converts the source's payload to the common forecast format."""
+
+
+class PrimaryForecastHandler(HTTPForecastHandler):
+    def _parse(self, response: httpx.Response) -> Forecast:
+        return [
+            {
+                'temperature': day['temperature'] / 10,
+                'precipitation': day['precipitation'] / 100,
+            }
+            for day in orjson.loads(response.content)
+        ]
+
+
+class ReserveForecastHandler(HTTPForecastHandler):
+    def _parse(self, response: httpx.Response) -> Forecast:
+        # The reserve payload is a list of {"data": "<temperature>C:<rain>"}
+        # objects, so one regex pass over the raw body replaces JSON
+        # decoding and per-day splitting.
+        days = _RESERVE_DAY_RE.findall(response.content)
+        # findall skips rows it cannot match, so make sure none were lost.
+        if len(days) != response.content.count(b'"data"'):
+            raise ValueError('Unexpected reserve forecast format')
+        return [
+            {
+                'temperature': float(temperature),
+                'precipitation': float(precipitation),
+            }
+            for temperature, precipitation in days
+        ]
+
+
+class HedgedForecastHandler(ForecastHandler):
+    """Queries all sources at once and takes the first successful answer."""
+
+    def __init__(self, handlers: Sequence[ForecastHandler]) -> None:
+        super().__init__()
+        self._handlers = handlers
+
+    async def fetch(self) -> Forecast | None:
+        tasks = [
+            asyncio.create_task(handler.fetch()) for handler in self._handlers
+        ]
+        try:
+            for next_completed in asyncio.as_completed(tasks):
+                forecast = await next_completed
+                if forecast is not None:
+                    return forecast
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+            # A cancelled request may still end with an error rather than
+            # CancelledError, so collect it instead of leaving it unread.
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class ForecastStrategy(ABC, Generic[ResultT]):
+    @abstractmethod
+    def calculate(self, forecast: Forecast) -> ResultT:
+        """Builds the endpoint's response from the month forecast."""
+
+
+class ThreeDayTemperatureStrategy(
+    ForecastStrategy[contracts.ThreeDayForecast]
+):
+    def calculate(self, forecast: Forecast) -> contracts.ThreeDayForecast:
+        return contracts.ThreeDayForecast(
+            forecast_d3=[day['temperature'] for day in forecast[:3]]
+        )
+
+
+class WeekAverageTemperatureStrategy(
+    ForecastStrategy[contracts.WeekAverageTemperature]
+):
+    def calculate(
+        self, forecast: Forecast
+    ) -> contracts.WeekAverageTemperature:
+        seven_day_forecast = forecast[:7]
+        total = sum(day['temperature'] for day in seven_day_forecast)
+        return contracts.WeekAverageTemperature(
+            forecast_d1=round(total / len(seven_day_forecast), 2)
+        )
+
+
+class WeekAveragePrecipitationStrategy(
+    ForecastStrategy[contracts.WeekAveragePrecipitation]
+):
+    def calculate(
+        self, forecast: Forecast
+    ) -> contracts.WeekAveragePrecipitation:
+        seven_day_forecast = forecast[:7]
+        total = sum(day['precipitation'] for day in seven_day_forecast)
+        return contracts.WeekAveragePrecipitation(
+            forecast_pp=round(total / len(seven_day_forecast), 2)
+        )
+
+
+class AggregatedWeekStrategy(ForecastStrategy[contracts.WeekSummary]):
+    def calculate(self, forecast: Forecast) -> contracts.WeekSummary:
+        seven_day_forecast = forecast[:7]
+        temperature = precipitation = 0.0
+        for day in seven_day_forecast:
+            temperature += day['temperature']
+            precipitation += day['precipitation']
+        days = len(seven_day_forecast)
+        return contracts.WeekSummary(
+            forecast_d1=round(temperature / days, 2),
+            forecast_pp=round(precipitation / days, 2),
+        )
+
+
+class ForecastContext(Generic[ResultT]):
+    def __init__(
+        self, strategy: ForecastStrategy[ResultT], handler: ForecastHandler
+    ) -> None:
+        self._strategy = strategy
+        self._handler = handler
+
+    async def forecast(self) -> ResultT:
+        month_forecast = await self._handler.get_month_forecast()
+        return self._strategy.calculate(month_forecast)
+
+
+# Strategies are stateless, so every app shares the same instances.
+_THREE_DAY_STRATEGY = ThreeDayTemperatureStrategy()
+_WEEK_AVG_TEMP_STRATEGY = WeekAverageTemperatureStrategy()
+_WEEK_AVG_PRECIP_STRATEGY = WeekAveragePrecipitationStrategy()
+_WEEK_SUMMARY_STRATEGY = AggregatedWeekStrategy()
+
+
+class ForecastContexts:
+    """Contexts of every forecast endpoint over one handler."""
+
+    def __init__(self, handler: ForecastHandler) -> None:
+        self.three_day = ForecastContext(_THREE_DAY_STRATEGY, handler)
+        self.week_avg_temp = ForecastContext(_WEEK_AVG_TEMP_STRATEGY, handler)
+        self.week_avg_precip = ForecastContext(
+            _WEEK_AVG_PRECIP_STRATEGY, handler
+        )
+        self.week_summary = ForecastContext(_WEEK_SUMMARY_STRATEGY, handler)
+
+
+def build_forecast_handler(client: httpx.AsyncClient) -> ForecastHandler:
+    primary_handler = PrimaryForecastHandler(client, app_settings.weather_url)
+    reserve_handler = ReserveForecastHandler(
+        client, app_settings.reserve_weather_url
+    )
+    return HedgedForecastHandler([primary_handler, reserve_handler])
+
+
+def get_forecast_contexts(request: Request) -> ForecastContexts:
+    contexts: ForecastContexts = request.app.state.forecast_contexts
+    return contexts
+
+
+@router.get('/weather/3days', response_model=contracts.ThreeDayForecast)
+async def three_day_forecast(
+    contexts: ForecastContexts = Depends(get_forecast_contexts),
+) -> contracts.ThreeDayForecast:
+    return await contexts.three_day.forecast()
+
+
+@router.get(
+    '/weather/week_avg_temp', response_model=contracts.WeekAverageTemperature
+)
+async def week_average_temperature(
+    contexts: ForecastContexts = Depends(get_forecast_contexts),
+) -> contracts.WeekAverageTemperature:
+    return await contexts.week_avg_temp.forecast()
+
+
+@router.get(
+    '/weather/week_avg_precip',
+    response_model=contracts.WeekAveragePrecipitation,
+)
+async def week_average_precipitation(
+    contexts: ForecastContexts = Depends(get_forecast_contexts),
+) -> contracts.WeekAveragePrecipitation:
+    return await contexts.week_avg_precip.forecast()
+
 
-@router.get("/weather", response_model=contracts.Message)
-async def weather_report() -> contracts.Message:
-    return contracts.Message(message='weather report')
+@router.get('/weather/week_summary', response_model=contracts.WeekSummary)
+async def week_summary(
+    contexts: ForecastContexts = Depends(get_forecast_contexts),
+) -> contracts.WeekSummary:
+    return await contexts.week_summary.forecast()
@@ -1,12 +1,24 @@
+import asyncio
+import copy
 import logging.config
+from typing import Any
 
+import httpx
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from config.settings import app_settings
+from server.api.parents import ParentsIndex
 from server.api.parents import router as parents_router
+from server.api.weather import ForecastContexts, build_forecast_handler
 from server.api.weather import router as weather_router
 
-logging_config = {
+logger = logging.getLogger(__name__)
+
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+HTTP_TIMEOUT = 30.0
+
+logging_config: dict[str, Any] = {
     "version": 1,
     "disable_existing_loggers": False,
     "handlers": {
@@ -21,11 +33,92 @@ logging_config = {
     },
 }
 
-logging.config.dictConfig(logging_config)
+_LOGGING_INITIALIZED = False
+
+
+def _configure_file_logging(
+    config: dict[str, Any], log_file_path: str
+) -> None:
+    config["handlers"]["file"] = {
+        "class": "logging.FileHandler",
+        "level": app_settings.log_level,
+        "filename": log_file_path,
+    }
+    config["root"]["handlers"].append("file")
+
+
+def _init_logging(config: dict[str, Any]) -> None:
+    global _LOGGING_INITIALIZED  # pylint: disable=global-statement
+    if _LOGGING_INITIALIZED:
+        return
+    logging.config.dictConfig(config)
+    _LOGGING_INITIALIZED = True
+
+
+def _running_on_uvloop() -> bool:
+    loop_module = type(asyncio.get_running_loop()).__module__
+    return loop_module.startswith('uvloop')
+
+
+class AppBuilder:
+    def __init__(self) -> None:
+        self._app = FastAPI(
+            default_response_class=ORJSONResponse,
+            on_startup=[self._startup],
+            on_shutdown=[self._shutdown],
+        )
+        self._api_prefix = app_settings.api_prefix
+        self._file_logging = app_settings.enable_file_logging
+        self._log_file_path = app_settings.log_file_path
+        self._logging_config = logging_config
+
+    def set_api_prefix(self, api_prefix: str) -> 'AppBuilder':
+        self._api_prefix = api_prefix
+        return self
+
+    def enable_file_logging(
+        self, log_file_path: str | None = None
+    ) -> 'AppBuilder':
+        self._file_logging = True
+        if log_file_path is not None:
+            self._log_file_path = log_file_path
+        return self
+
+    def build(self) -> FastAPI:
+        self._logging_config = copy.deepcopy(logging_config)
+        if self._file_logging:
+            _configure_file_logging(self._logging_config, self._log_file_path)
+        self._app.include_router(
+            parents_router, prefix=self._api_prefix, tags=['ParentsSearch']
+        )
+        self._app.include_router(
+            weather_router, prefix=self._api_prefix, tags=['WeatherReport']
+        )
+        return self._app
+
+    async def _startup(self) -> None:
+        _init_logging(self._logging_config)
+        if not _running_on_uvloop():
+            logger.warning(
+                'Running on the default asyncio event loop, '
+                'start the server with `python -m server` to use uvloop'
+            )
+        client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        self._app.state.http_client = client
+        forecast_handler = build_forecast_handler(client)
+        self._app.state.forecast_handler = forecast_handler
+        self._app.state.forecast_contexts = ForecastContexts(forecast_handler)
+        parents_index = None
+        if app_settings.enable_parents_index:
+            parents_index = ParentsIndex(app_settings.files_path)
+            parents_index.start()
+        self._app.state.parents_index = parents_index
+
+    async def _shutdown(self) -> None:
+        await self._app.state.http_client.aclose()
+        if self._app.state.parents_index is not None:
+            self._app.state.parents_index.stop()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
-    app.include_router(parents_router, prefix='/api', tags=['ParentsSearch'])
-    app.include_router(weather_router, prefix='/api', tags=['WeatherReport'])
-    return app
+    return AppBuilder().build()
@@ -1,5 +1,22 @@
 from pydantic import BaseModel
 
 
-class Message(BaseModel):
-    message: str
+class SearchResult(BaseModel):
+    found_parents: list[str]
+
+
+class ThreeDayForecast(BaseModel):
+    forecast_d3: list[float]
+
+
+class WeekAverageTemperature(BaseModel):
+    forecast_d1: float
+
+
+class WeekAveragePrecipitation(BaseModel):
+    forecast_pp: float
+
+
+class WeekSummary(BaseModel):
+    forecast_d1: float
+    forecast_pp: float
@@ -1,17 +1,357 @@
+import asyncio
+import gc
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Iterator
+
+import httpx
+import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
 
+from config.settings import app_settings
+from server.api.parents import FileIterator, XMLFileParser
+from server.api.weather import (
+    Forecast,
+    ForecastHandler,
+    HedgedForecastHandler,
+    PrimaryForecastHandler,
+    ReserveForecastHandler,
+    build_forecast_handler,
+)
+from server.app import AppBuilder, logging_config
 from server.asgi import app
 
-client = TestClient(app)
+PRIMARY_FORECAST = [
+    {'temperature': 250 + day, 'precipitation': 10 + day} for day in range(30)
+]
+RESERVE_FORECAST = [
+    {'data': f'{20 + day}.5C:0.{day + 1:02d}'} for day in range(30)
+]
+
+
+@pytest.fixture(name='client')
+def fixture_client() -> Iterator[TestClient]:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def mock_weather(
+    mocker: MockerFixture, primary: Any = None, reserve: Any = None
+) -> list[str]:
+    requested_urls: list[str] = []
+    responses = {
+        app_settings.weather_url: primary,
+        app_settings.reserve_weather_url: reserve,
+    }
+
+    async def fake_get(_: httpx.AsyncClient, url: str) -> httpx.Response:
+        requested_urls.append(url)
+        response = responses[url]
+        if isinstance(response, Exception):
+            raise response
+        if response is None:
+            return httpx.Response(500)
+        if isinstance(response, bytes):
+            return httpx.Response(200, content=response)
+        return httpx.Response(200, json=response)
+
+    mocker.patch.object(httpx.AsyncClient, 'get', fake_get)
+    return requested_urls
+
+
+@pytest.mark.parametrize(
+    'child_name, parents',
+    [('Marta', ['Alex']), ('Oliver', ['Maria']), ('Nobody', [])],
+)
+def test_find_parents(
+    client: TestClient, child_name: str, parents: list[str]
+) -> None:
+    response = client.get(f"/api/parents/{child_name}")
+    assert response.status_code == 200
+    assert response.json() == {"found_parents": parents}
+
+
+def test_find_parents_without_index(mocker: MockerFixture) -> None:
+    mocker.patch(
+        'server.app.app_settings',
+        replace(app_settings, enable_parents_index=False),
+    )
+    with TestClient(app) as test_client:
+        response = test_client.get("/api/parents/Vlad")
+    assert response.status_code == 200
+    assert response.json() == {"found_parents": ["Alex"]}
+
+
+def test_find_parents_without_files(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    mocker.patch(
+        'server.app.app_settings',
+        replace(app_settings, enable_parents_index=False),
+    )
+    mocker.patch(
+        'server.api.parents.app_settings',
+        replace(app_settings, files_path=str(tmp_path / 'missing')),
+    )
+    with TestClient(app) as test_client:
+        response = test_client.get("/api/parents/Vlad")
+    assert response.status_code == 200
+    assert response.json() == {"found_parents": []}
+
+
+def test_find_parents_skips_unusable_files(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    (tmp_path / 'report.json').write_text(
+        '{"persons": [{"name": "Alex", "children": [{"name": "Vlad"}]}]}',
+        encoding='utf-8',
+    )
+    (tmp_path / 'broken.yml').write_bytes(b'persons:\n  - Alex\n')
+    (tmp_path / 'latin1.yml').write_bytes(b'persons:\n  - name: J\xf6rg\n')
+    # A file deleted between the directory walk and reading it.
+    files = [
+        *FileIterator(str(tmp_path)),
+        (str(tmp_path / 'vanished.xml'), XMLFileParser()),
+    ]
+    mocker.patch('server.api.parents.FileIterator', return_value=files)
+    mocker.patch(
+        'server.app.app_settings',
+        replace(app_settings, enable_parents_index=False),
+    )
+    with TestClient(app) as test_client:
+        response = test_client.get("/api/parents/Vlad")
+    assert response.status_code == 200
+    assert response.json() == {"found_parents": ["Alex"]}
+
+
+def test_three_day_forecast_from_primary(
+    client: TestClient, mocker: MockerFixture
+) -> None:
+    mock_weather(mocker, primary=PRIMARY_FORECAST)
+    response = client.get("/api/weather/3days")
+    assert response.status_code == 200
+    assert response.json() == {"forecast_d3": [25.0, 25.1, 25.2]}
+
+
+def test_week_average_temperature_from_primary(
+    client: TestClient, mocker: MockerFixture
+) -> None:
+    mock_weather(mocker, primary=PRIMARY_FORECAST)
+    response = client.get("/api/weather/week_avg_temp")
+    assert response.status_code == 200
+    assert response.json() == {"forecast_d1": 25.3}
+
+
+def test_week_average_precipitation_from_primary(
+    client: TestClient, mocker: MockerFixture
+) -> None:
+    mock_weather(mocker, primary=PRIMARY_FORECAST)
+    response = client.get("/api/weather/week_avg_precip")
+    assert response.status_code == 200
+    assert response.json() == {"forecast_pp": 0.13}
+
+
+def test_week_summary_from_primary(
+    client: TestClient, mocker: MockerFixture
+) -> None:
+    mock_weather(mocker, primary=PRIMARY_FORECAST)
+    response = client.get("/api/weather/week_summary")
+    assert response.status_code == 200
+    assert response.json() == {"forecast_d1": 25.3, "forecast_pp": 0.13}
 
 
-def test_find_parents() -> None:
-    response = client.get("/api/parents")
+@pytest.mark.parametrize(
+    'primary',
+    [
+        None,
+        httpx.ConnectError('connection refused'),
+        b'<html>Bad Gateway</html>',
+        [{'temp': 250}],
+        {'temperature': 250},
+    ],
+)
+def test_forecast_falls_back_to_reserve(
+    client: TestClient, mocker: MockerFixture, primary: Any
+) -> None:
+    mock_weather(mocker, primary=primary, reserve=RESERVE_FORECAST)
+    response = client.get("/api/weather/3days")
     assert response.status_code == 200
-    assert response.json() == {"message": "found parents"}
+    assert response.json() == {"forecast_d3": [20.5, 21.5, 22.5]}
+
+
+def test_forecast_is_cached(client: TestClient, mocker: MockerFixture) -> None:
+    requested_urls = mock_weather(mocker, primary=PRIMARY_FORECAST)
+    client.get("/api/weather/3days")
+    client.get("/api/weather/week_avg_temp")
+    client.get("/api/weather/week_avg_precip")
+    assert sorted(requested_urls) == sorted(
+        [app_settings.weather_url, app_settings.reserve_weather_url]
+    )
+
+    app.state.forecast_handler.cache_clear()
+    client.get("/api/weather/3days")
+    assert len(requested_urls) == 4
+
+    mocker.patch('server.api.weather._CACHE_TTL', 0)
+    client.get("/api/weather/3days")
+    assert len(requested_urls) == 6
+
+
+@pytest.mark.parametrize(
+    'reserve',
+    [
+        None,
+        httpx.ConnectError('connection refused'),
+        [],
+        RESERVE_FORECAST[:2] + [{'data': 'n/a'}],
+    ],
+)
+def test_forecast_unavailable(
+    client: TestClient, mocker: MockerFixture, reserve: Any
+) -> None:
+    mock_weather(mocker, reserve=reserve)
+    response = client.get("/api/weather/3days")
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'primary, outcome',
+    [
+        (PRIMARY_FORECAST, None),
+        (None, HTTPException),
+    ],
+)
+async def test_concurrent_requests_share_one_fetch(
+    mocker: MockerFixture, primary: Any, outcome: type[Exception] | None
+) -> None:
+    requested_urls = mock_weather(mocker, primary=primary)
+    async with httpx.AsyncClient() as http_client:
+        handler = build_forecast_handler(http_client)
+        results = await asyncio.gather(
+            *(handler.get_month_forecast() for _ in range(3)),
+            return_exceptions=True,
+        )
+    assert sorted(requested_urls) == sorted(
+        [app_settings.weather_url, app_settings.reserve_weather_url]
+    )
+    if outcome is None:
+        assert all(result == results[0] for result in results)
+    else:
+        assert all(isinstance(result, outcome) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_failure_without_callers_is_not_logged(
+    mocker: MockerFixture,
+) -> None:
+    mock_weather(mocker)
+    exception_handler = mocker.Mock()
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(exception_handler)
+    async with httpx.AsyncClient() as http_client:
+        handler = build_forecast_handler(http_client)
+        caller = asyncio.create_task(handler.get_month_forecast())
+        await asyncio.sleep(0)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0.05)
+    gc.collect()
+    loop.set_exception_handler(None)
+    exception_handler.assert_not_called()
+
 
+@pytest.mark.asyncio
+async def test_hedge_waits_for_cancelled_requests() -> None:
+    class StaticHandler(ForecastHandler):
+        async def fetch(self) -> Forecast | None:
+            return [{'temperature': 25.0, 'precipitation': 0.1}]
 
-def test_report_weather() -> None:
-    response = client.get("/api/weather")
+    class SlowHandler(ForecastHandler):
+        finished = False
+
+        async def fetch(self) -> Forecast | None:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError as error:
+                raise RuntimeError('connection closed') from error
+            finally:
+                self.finished = True
+            return None
+
+    slow_handler = SlowHandler()
+    handler = HedgedForecastHandler([slow_handler, StaticHandler()])
+    assert await handler.fetch() == [
+        {'temperature': 25.0, 'precipitation': 0.1}
+    ]
+    assert slow_handler.finished
+
+
+@pytest.mark.asyncio
+async def test_chain_falls_back_to_next_handler(mocker: MockerFixture) -> None:
+    mock_weather(mocker, reserve=RESERVE_FORECAST)
+    async with httpx.AsyncClient() as http_client:
+        handler = PrimaryForecastHandler(http_client, app_settings.weather_url)
+        handler.set_next(
+            ReserveForecastHandler(
+                http_client, app_settings.reserve_weather_url
+            )
+        )
+        forecast = await handler.get_month_forecast()
+    assert forecast[0] == {'temperature': 20.5, 'precipitation': 0.01}
+
+
+def test_builder_configures_app(mocker: MockerFixture) -> None:
+    mocker.patch('server.app._LOGGING_INITIALIZED', False)
+    dict_config = mocker.patch('logging.config.dictConfig')
+    built_app = (
+        AppBuilder()
+        .set_api_prefix('/api/v2')
+        .enable_file_logging('weather.log')
+        .build()
+    )
+    with TestClient(built_app) as test_client:
+        response = test_client.get("/api/v2/parents/Max")
     assert response.status_code == 200
-    assert response.json() == {"message": "weather report"}
+
+    dict_config.assert_called_once()
+    config = dict_config.call_args.args[0]
+    assert config["handlers"]["file"]["filename"] == 'weather.log'
+    assert config["root"]["handlers"] == ["console", "file"]
+    assert logging_config["root"]["handlers"] == ["console"]
+
+
+def test_logging_is_initialized_once(mocker: MockerFixture) -> None:
+    mocker.patch('server.app._LOGGING_INITIALIZED', False)
+    dict_config = mocker.patch('logging.config.dictConfig')
+    for _ in range(2):
+        with TestClient(AppBuilder().build()):
+            pass
+    dict_config.assert_called_once_with(logging_config)
+
+
+def test_file_logging_uses_default_path(mocker: MockerFixture) -> None:
+    mocker.patch('server.app._LOGGING_INITIALIZED', False)
+    dict_config = mocker.patch('logging.config.dictConfig')
+    with TestClient(AppBuilder().enable_file_logging().build()):
+        pass
+    config = dict_config.call_args.args[0]
+    assert config["handlers"]["file"]["filename"] == app_settings.log_file_path
+
+
+def test_startup_warns_without_uvloop(
+    mocker: MockerFixture, caplog: pytest.LogCaptureFixture
+) -> None:
+    mocker.patch('server.app._LOGGING_INITIALIZED', True)
+    with TestClient(AppBuilder().enable_file_logging().build()):
+        pass
+    assert 'default asyncio event loop' in caplog.text
+
+    caplog.clear()
+    mocker.patch('server.app._running_on_uvloop', return_value=True)
+    with TestClient(AppBuilder().build()):
+        pass
+    assert 'default asyncio event loop' not in caplog.text
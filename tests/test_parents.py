@@ -0,0 +1,387 @@
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+from pytest_mock import MockerFixture
+from watchdog.events import (
+    DirCreatedEvent,
+    DirModifiedEvent,
+    FileClosedEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+)
+
+import server.api.parents as parents_module
+
+from server.api.parents import (
+    AbstractFileFactory,
+    FileIterator,
+    FileParser,
+    JSONFileFactory,
+    JSONFileParser,
+    ParentsIndex,
+    XMLFileFactory,
+    XMLFileParser,
+    YMLFileFactory,
+    YMLFileParser,
+    _CHILD_INDEX_CACHE,
+    _get_child_index,
+)
+
+PERSONS = {
+    'persons': [
+        {'name': 'Alex', 'children': [{'name': 'Marta'}, {'name': 'Vlad'}]},
+        {'name': 'Maria', 'children': [{'name': 'Max'}, {'name': 'Oliver'}]},
+    ]
+}
+
+
+@pytest.mark.parametrize(
+    'factory, parser_class, file_name',
+    [
+        (JSONFileFactory(), JSONFileParser, 'report.json'),
+        (YMLFileFactory(), YMLFileParser, 'children.yml'),
+        (YMLFileFactory(), YMLFileParser, 'children.yaml'),
+        (XMLFileFactory(), XMLFileParser, 'list.xml'),
+    ],
+)
+def test_factory_creates_parser(
+    factory: AbstractFileFactory,
+    parser_class: type[FileParser],
+    file_name: str,
+) -> None:
+    assert factory.is_correct_format(file_name)
+    assert not factory.is_correct_format('notes.txt')
+    assert isinstance(factory.create_parser(), parser_class)
+    assert factory.create_parser() is factory.create_parser()
+
+
+@pytest.mark.parametrize(
+    'parser, file_path',
+    [
+        (JSONFileParser(), 'files/subdirectory/report_2029.03.11.json'),
+        (YMLFileParser(), 'files/children.yml'),
+        (XMLFileParser(), 'files/list.xml'),
+    ],
+)
+def test_parser_reads_persons(parser: FileParser, file_path: str) -> None:
+    assert parser.parse(file_path) == PERSONS
+
+
+def test_yml_parser_works_without_libyaml(
+    mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.delattr(yaml, 'CSafeLoader', raising=False)
+    spec = importlib.util.find_spec('server.api.parents')
+    assert spec is not None and spec.loader is not None
+    parents = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(parents)
+    load = mocker.spy(yaml, 'load')
+    assert parents.YMLFileParser().parse('files/children.yml') == PERSONS
+    assert load.call_args.kwargs['Loader'] is yaml.SafeLoader
+
+
+@pytest.mark.parametrize(
+    'parser, file_name, content',
+    [
+        (JSONFileParser(), 'broken.json', '{"persons": ['),
+        (YMLFileParser(), 'broken.yml', 'persons: [\n'),
+        (XMLFileParser(), 'broken.xml', '<root><person></root>'),
+    ],
+)
+def test_parser_skips_malformed_file(
+    tmp_path: Path, parser: FileParser, file_name: str, content: str
+) -> None:
+    file_path = tmp_path / file_name
+    file_path.write_text(content, encoding='utf-8')
+    assert parser.parse(str(file_path)) is None
+
+
+@pytest.mark.parametrize(
+    'parser, file_path',
+    [
+        (JSONFileParser(), 'files/subdirectory/report_2029.03.11.json'),
+        (YMLFileParser(), 'files/children.yml'),
+        (XMLFileParser(), 'files/list.xml'),
+    ],
+)
+def test_parser_iterates_persons(parser: FileParser, file_path: str) -> None:
+    assert list(parser.iter_persons(file_path)) == PERSONS['persons']
+
+
+def test_xml_parser_skips_nameless_and_nested_persons(tmp_path: Path) -> None:
+    file_path = tmp_path / 'list.xml'
+    file_path.write_text(
+        '<root>'
+        '<person><child name="X"/></person>'
+        '<person name="Alex"><child/><child name="Marta"/></person>'
+        '<group><person name="Bob"><child name="Y"/></person></group>'
+        '<person name="Maria">'
+        '<person name="Eve"><child name="Z"/></person>'
+        '<child name="Max"/>'
+        '</person>'
+        '</root>',
+        encoding='utf-8',
+    )
+    assert XMLFileParser().parse(str(file_path)) == {
+        'persons': [
+            {'name': 'Alex', 'children': [{'name': 'Marta'}]},
+            {'name': 'Maria', 'children': [{'name': 'Max'}]},
+        ]
+    }
+
+
+def test_json_parser_iterates_persons_without_ijson(
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch('server.api.parents.ijson', None)
+    persons = JSONFileParser().iter_persons(
+        'files/subdirectory/report_2029.03.11.json'
+    )
+    assert list(persons) == PERSONS['persons']
+
+
+@pytest.mark.parametrize(
+    'parser, file_name, content, persons',
+    [
+        (
+            JSONFileParser(),
+            'broken.json',
+            '{"persons": [{"name": "A"}, {',
+            [{'name': 'A'}],
+        ),
+        (XMLFileParser(), 'broken.xml', '<root><person></root>', []),
+    ],
+)
+def test_parser_stops_at_malformed_content(
+    tmp_path: Path,
+    parser: FileParser,
+    file_name: str,
+    content: str,
+    persons: list[dict[str, str]],
+) -> None:
+    file_path = tmp_path / file_name
+    file_path.write_text(content, encoding='utf-8')
+    assert list(parser.iter_persons(str(file_path))) == persons
+
+
+def test_file_iterator_skips_unsupported_files(tmp_path: Path) -> None:
+    (tmp_path / 'nested').mkdir()
+    (tmp_path / 'nested' / 'report.json').write_text('{}', encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('persons', encoding='utf-8')
+    (tmp_path / 'dangling.json').symlink_to(tmp_path / 'missing.json')
+    assert [
+        (file_path, type(parser))
+        for file_path, parser in FileIterator(str(tmp_path))
+    ] == [(str(tmp_path / 'nested' / 'report.json'), JSONFileParser)]
+
+
+def test_file_iterator_skips_missing_directory(tmp_path: Path) -> None:
+    assert not list(FileIterator(str(tmp_path / 'missing')))
+
+
+def test_child_index_is_rebuilt_when_file_changes(tmp_path: Path) -> None:
+    file_path = tmp_path / 'report.json'
+    file_path.write_text(
+        '{"persons": [{"name": "Alex", "children": [{"name": "Marta"}]}]}',
+        encoding='utf-8',
+    )
+    parser = JSONFileParser()
+    child_index = _get_child_index(str(file_path), parser)
+    assert child_index == {'Marta': ['Alex']}
+    assert _get_child_index(str(file_path), parser) is child_index
+
+    file_path.write_text(
+        '{"persons": [{"name": "Bob", "children": [{"name": "Marta"}]}]}',
+        encoding='utf-8',
+    )
+    mtime_ns = file_path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(file_path, ns=(mtime_ns, mtime_ns))
+    assert _get_child_index(str(file_path), parser) == {'Marta': ['Bob']}
+
+
+def test_child_index_cache_evicts_least_recently_used(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    mocker.patch('server.api.parents._CHILD_INDEX_CACHE_SIZE', 1)
+    parser = JSONFileParser()
+    file_paths = [str(tmp_path / 'first.json'), str(tmp_path / 'second.json')]
+    for file_path in file_paths:
+        Path(file_path).write_text('{"persons": []}', encoding='utf-8')
+        _get_child_index(file_path, parser)
+    assert file_paths[0] not in _CHILD_INDEX_CACHE
+    assert file_paths[1] in _CHILD_INDEX_CACHE
+
+
+def test_parents_index_is_rebuilt_on_file_change(tmp_path: Path) -> None:
+    file_path = tmp_path / 'report.json'
+    file_path.write_text(
+        '{"persons": [{"name": "Alex", "children": [{"name": "Marta"}]}]}',
+        encoding='utf-8',
+    )
+    (tmp_path / 'children.yml').write_text(
+        'persons:\n  - name: Alex\n    children:\n      - name: Marta\n',
+        encoding='utf-8',
+    )
+    parents_index = ParentsIndex(str(tmp_path))
+    parents_index.stop()
+    parents_index.rebuild()
+    assert parents_index.get('Marta') == ['Alex']
+    assert parents_index.get('Vlad') == []
+
+    file_path.write_text(
+        '{"persons": [{"name": "Bob", "children": [{"name": "Vlad"}]}]}',
+        encoding='utf-8',
+    )
+    mtime_ns = file_path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(file_path, ns=(mtime_ns, mtime_ns))
+    closed_event = FileClosedEvent(  # type: ignore[no-untyped-call]
+        str(file_path)
+    )
+    parents_index.on_any_event(closed_event)
+    assert parents_index.get('Vlad') == []
+    modified_event = FileModifiedEvent(  # type: ignore[no-untyped-call]
+        str(file_path)
+    )
+    parents_index.on_any_event(modified_event)
+    assert parents_index.get('Vlad') == ['Bob']
+
+
+def test_parents_index_skips_vanished_file(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    for file_name in ('first.json', 'second.json'):
+        (tmp_path / file_name).write_text(
+            '{"persons": [{"name": "Alex", "children": [{"name": "Marta"}]}]}',
+            encoding='utf-8',
+        )
+    vanished_path = str(tmp_path / 'first.json')
+
+    def get_child_index(
+        file_path: str, parser: FileParser
+    ) -> dict[str, list[str]]:
+        if file_path == vanished_path:
+            raise FileNotFoundError(file_path)
+        return _get_child_index(file_path, parser)
+
+    mocker.patch(
+        'server.api.parents._get_child_index', side_effect=get_child_index
+    )
+    parents_index = ParentsIndex(str(tmp_path))
+    parents_index.rebuild()
+    assert parents_index.get('Marta') == ['Alex']
+
+
+def test_parents_index_starts_without_root(tmp_path: Path) -> None:
+    parents_index = ParentsIndex(str(tmp_path / 'missing'))
+    parents_index.start()
+    assert parents_index.get('Marta') == []
+    parents_index.stop()
+
+
+@pytest.mark.parametrize(
+    'file_name, content',
+    [
+        ('names.yml', b'persons:\n  - Alex\n'),
+        ('nameless.json', b'{"persons": [{"children": [{"name": "X"}]}]}'),
+        (
+            'children.json',
+            b'{"persons": [{"name": "A", "children": {"name": "X"}}]}',
+        ),
+        ('latin1.yml', b'persons:\n  - name: J\xf6rg\n'),
+        ('scalar.yml', b'persons: 5\n'),
+        ('list.yml', b'- persons\n'),
+    ],
+)
+def test_parents_index_skips_file_of_wrong_shape(
+    tmp_path: Path, file_name: str, content: bytes
+) -> None:
+    (tmp_path / file_name).write_bytes(content)
+    (tmp_path / 'report.json').write_text(
+        '{"persons": [{"name": "Alex", "children": '
+        '[{"name": "Marta"}, {"age": 3}]}]}',
+        encoding='utf-8',
+    )
+    parents_index = ParentsIndex(str(tmp_path))
+    parents_index.start()
+    parents_index.stop()
+    assert parents_index.get('Marta') == ['Alex']
+    assert parents_index.get('X') == []
+
+
+def test_parents_index_survives_failed_update(
+    tmp_path: Path, mocker: MockerFixture, caplog: pytest.LogCaptureFixture
+) -> None:
+    parents_index = ParentsIndex(str(tmp_path))
+    mocker.patch(
+        'server.api.parents._read_child_index',
+        side_effect=RuntimeError('boom'),
+    )
+    modified_event = FileModifiedEvent(  # type: ignore[no-untyped-call]
+        str(tmp_path / 'report.json')
+    )
+    parents_index.on_any_event(modified_event)
+    assert 'Failed to update the parents index' in caplog.text
+
+
+def test_parents_index_updates_only_changed_files(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    first_path = str(tmp_path / 'first.json')
+    second_path = str(tmp_path / 'second.json')
+    Path(first_path).write_text(
+        '{"persons": [{"name": "Alex", "children": [{"name": "Marta"}]}]}',
+        encoding='utf-8',
+    )
+    parents_index = ParentsIndex(str(tmp_path))
+    parents_index.rebuild()
+    rebuild = mocker.spy(parents_index, 'rebuild')
+    read_child_index = mocker.spy(parents_module, '_read_child_index')
+
+    Path(second_path).write_text(
+        '{"persons": [{"name": "Bob", "children": [{"name": "Marta"}]}]}',
+        encoding='utf-8',
+    )
+    for event in (
+        FileCreatedEvent(second_path),  # type: ignore[no-untyped-call]
+        DirModifiedEvent(str(tmp_path)),  # type: ignore[no-untyped-call]
+        FileModifiedEvent(  # type: ignore[no-untyped-call]
+            str(tmp_path / 'notes.txt')
+        ),
+        FileDeletedEvent(  # type: ignore[no-untyped-call]
+            str(tmp_path / 'notes.txt')
+        ),
+    ):
+        parents_index.on_any_event(event)
+    assert parents_index.get('Marta') == ['Alex', 'Bob']
+    read_child_index.assert_called_once_with(
+        second_path, JSONFileFactory().create_parser()
+    )
+
+    moved_path = str(tmp_path / 'moved.json')
+    os.rename(first_path, moved_path)
+    parents_index.on_any_event(
+        FileMovedEvent(first_path, moved_path)  # type: ignore[no-untyped-call]
+    )
+    assert parents_index.get('Marta') == ['Bob', 'Alex']
+
+    os.remove(second_path)
+    parents_index.on_any_event(
+        FileDeletedEvent(second_path)  # type: ignore[no-untyped-call]
+    )
+    parents_index.on_any_event(
+        FileModifiedEvent(second_path)  # type: ignore[no-untyped-call]
+    )
+    assert parents_index.get('Marta') == ['Alex']
+    rebuild.assert_not_called()
+
+    parents_index.on_any_event(
+        DirCreatedEvent(  # type: ignore[no-untyped-call]
+            str(tmp_path / 'nested')
+        )
+    )
+    rebuild.assert_called_once()
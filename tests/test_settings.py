@@ -0,0 +1,36 @@
+import os
+from typing import Iterator
+
+import pytest
+
+from config.settings import ENV_PREFIX, AppSetting, get_settings
+
+
+@pytest.fixture(autouse=True)
+def clear_settings_cache() -> Iterator[None]:
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def test_settings_defaults(monkeypatch: pytest.MonkeyPatch) -> None:
+    for name in list(os.environ):
+        if name.startswith(ENV_PREFIX):
+            monkeypatch.delenv(name)
+    settings = get_settings()
+    assert settings == AppSetting()
+    assert get_settings() is settings
+
+
+def test_settings_from_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('APP_LOG_LEVEL', 'INFO')
+    monkeypatch.setenv('APP_PORT', '9000')
+    monkeypatch.setenv('APP_API_PREFIX', '/api/v1')
+    monkeypatch.setenv('APP_ENABLE_FILE_LOGGING', 'True')
+    monkeypatch.setenv('APP_ENABLE_PARENTS_INDEX', '0')
+    settings = get_settings()
+    assert settings.log_level == 'INFO'
+    assert settings.port == 9000
+    assert settings.api_prefix == '/api/v1'
+    assert settings.enable_file_logging is True
+    assert settings.enable_parents_index is False